@@ -1,9 +1,11 @@
 import argparse
 import asyncio
+import json
+import os
+import shutil
 import subprocess
 import sys
 from typing import Collection
-import yaml
 from pathlib import Path
 
 from dbtmon.monitor import DBTMonitor
@@ -20,13 +22,14 @@ parser.add_argument(
     "--polling-rate",
     type=float,
     default=0.2,
-    help="Polling rate for checking stdin (default: 0.2)",
+    help="Refresh rate for the running jobs display (default: 0.2)",
 )
+# Deprecated: stdin is no longer polled, so this is accepted but has no effect
 parser.add_argument(
     "--minimum-wait",
     type=float,
     default=0.025,
-    help="Minimum wait time before checking stdin (default: 0.025)",
+    help=argparse.SUPPRESS,
 )
 parser.add_argument(
     "--dbtmon-project-dir",
@@ -67,17 +70,29 @@ parser.add_argument(
     help="Path to the dbtmon manifest file (default: target/dbtmon_manifest.json)",
 )
 
-# Provide a list of CLI options to export
-OPTIONS: list[str] = []
-for action in parser._actions:
-    OPTIONS.extend(action.option_strings)
+# Kernel buffer size for the pipe between dbt and __dbtmonpipe__, so bursts of dbt output do not
+# block dbt while the display catches up
+PIPE_SIZE = 1024 * 1024
 
-OPTIONS = [option.lstrip("-") for option in OPTIONS]
+# CLI options that may be set from the config file. Keep in sync with the parser arguments above
+OPTIONS: frozenset[str] = frozenset({
+    "h",
+    "help",
+    "version",
+    "polling-rate",
+    "minimum-wait",
+    "dbtmon-project-dir",
+    "disable-blocking-thread-detection",
+    "minimum-blocking-time",
+    "blocking-minimum-job-size",
+    "disable-dbtmon-manifest",
+    "dbtmon-manifest-path",
+})
 
 
 def pipe():
     args = parser.parse_args()
-    monitor = DBTMonitor(polling_rate=args.polling_rate, minimum_wait=args.minimum_wait)
+    monitor = DBTMonitor(polling_rate=args.polling_rate)
     try:
         asyncio.run(monitor.run())
     except KeyboardInterrupt:
@@ -85,6 +100,71 @@ def pipe():
         sys.exit(0)
 
 
+def read_config(config_path: Path) -> tuple[list[str], list[str]]:
+    """
+    Converts the dbtmon config file into command line arguments for __dbtmonpipe__. Returns the
+    arguments and any unknown config keys.
+
+    The result is cached next to the config file and reused while the config file's modification
+    time and size are unchanged, so yaml is only imported and parsed after the config changes.
+    """
+    stat = config_path.stat()
+    cache_key = {
+        "version": __version__,
+        # The cached args and unknown keys depend on which options are accepted
+        "options": sorted(OPTIONS),
+        "mtime": stat.st_mtime_ns,
+        "size": stat.st_size,
+    }
+    cache_path = config_path.with_name(f".{config_path.name}.cache")
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cache: dict = json.load(f)
+        if isinstance(cache, dict) and all(
+            cache.get(key) == value for key, value in cache_key.items()
+        ):
+            return cache["args"], cache["unknown_keys"]
+    except (OSError, ValueError, KeyError):
+        # Missing or unreadable cache, parse the config file instead
+        pass
+
+    import yaml
+    try:
+        from yaml import CSafeLoader as SafeLoader
+    except ImportError:
+        from yaml import SafeLoader
+
+    with open(config_path, "r") as f:
+        config: dict = yaml.load(f, Loader=SafeLoader) or {}
+
+    args = []
+    unknown_keys = []
+    for key, value in config.items():
+        if key not in OPTIONS:
+            unknown_keys.append(key)
+            continue
+
+        args.append(f"--{key}")
+        if value is None:
+            continue
+
+        if isinstance(value, Collection) and not isinstance(value, str):
+            args.extend(value)
+        else:
+            args.append(value)
+
+    args = [str(arg) for arg in args]
+
+    try:
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump({**cache_key, "args": args, "unknown_keys": unknown_keys}, f)
+    except OSError:
+        # Caching is best effort
+        pass
+
+    return args, unknown_keys
+
+
 def cli():
     if len(sys.argv) == 2 and sys.argv[1] in {"--help", "-h", "--version"}:
         # Pass these flags to the internal pipe directly
@@ -104,41 +184,75 @@ def cli():
 
     dbtmon_config = Path.home() / ".dbt" / "dbtmon.yml"
     if dbtmon_config.exists():
-        with open(dbtmon_config, "r") as f:
-            config: dict = yaml.safe_load(f) or {}
+        config_args, unknown_keys = read_config(dbtmon_config)
+        for key in unknown_keys:
+            print(
+                f"Warning: Unknown config option '{key}' in {dbtmon_config}",
+                file=sys.stderr,
+            )
+        dbtmon_args.extend(config_args)
+
+    dbt_command = ["dbt"] + sys.argv[1:]
+    # __dbtmonpipe__ is installed as an entry point
+    dbtmon_command = ["__dbtmonpipe__"] + dbtmon_args
 
-        for key, value in config.items():
-            if key not in OPTIONS:
-                print(
-                    f"Warning: Unknown config option '{key}' in {dbtmon_config}",
-                    file=sys.stderr,
-                )
-                continue
+    if not hasattr(os, "fork"):
+        # No fork (Windows), so this process stays alive to connect the two commands
+        popen_pipeline(dbt_command, dbtmon_command)
+        return
 
-            dbtmon_args.append(f"--{key}")
-            if value is None:
-                continue
+    for command in (dbt_command, dbtmon_command):
+        if shutil.which(command[0]) is None:
+            print(f"Error running command: '{command[0]}' not found", file=sys.stderr)
+            sys.exit(1)
 
-            if isinstance(value, Collection):
-                dbtmon_args.extend(value)
-            else:
-                dbtmon_args.append(value)
+    # Set up the pipeline like a shell would: dbt runs in a forked child writing into the pipe and
+    # this process is replaced by __dbtmonpipe__ reading from it, so no idle Python process remains
+    read_fd, write_fd = os.pipe()
+    set_pipe_size(write_fd)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    if os.fork() == 0:
+        os.dup2(write_fd, sys.stdout.fileno())
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stderr.fileno())
+        os.close(devnull)
+        os.close(read_fd)
+        os.close(write_fd)
+        try:
+            os.execvp(dbt_command[0], dbt_command)
+        finally:
+            # Only reached if exec failed
+            os._exit(127)
+
+    os.dup2(read_fd, sys.stdin.fileno())
+    os.close(read_fd)
+    os.close(write_fd)
+    os.execvp(dbtmon_command[0], dbtmon_command)
+
+
+def set_pipe_size(fd: int):
+    """Grow the pipe buffer to PIPE_SIZE where the platform allows it (Linux only)"""
+    try:
+        import fcntl
+        fcntl.fcntl(fd, fcntl.F_SETPIPE_SZ, PIPE_SIZE)
+    except (ImportError, AttributeError, OSError):
+        # Unsupported, or above the system limit: keep the default size
+        pass
 
-            dbtmon_args = [str(arg) for arg in dbtmon_args]
 
+def popen_pipeline(dbt_command: list[str], dbtmon_command: list[str]):
     try:
         # Run `dbt` with user args, pipe stdout into __dbtmonpipe__
+        # The pipe is only handed over to __dbtmonpipe__, so it stays raw bytes on this side
         dbt = subprocess.Popen(
-            ["dbt"] + sys.argv[1:],
+            dbt_command,
             stdout=subprocess.PIPE,
             stderr=subprocess.DEVNULL,
-            bufsize=1,
-            universal_newlines=True,
         )
 
-        # __dbtmonpipe__ is installed as an entry point
         dbtmon = subprocess.Popen(
-            ["__dbtmonpipe__"] + dbtmon_args,
+            dbtmon_command,
             stdin=dbt.stdout,
         )
 
@@ -4,6 +4,7 @@ from dataclasses import dataclass
 class DBTMonConfig:
     # Runtime parameters
     polling_rate: float = 0.2
+    # Deprecated: stdin is no longer polled, so this has no effect
     minimum_wait: float = 0.025
     dbtmon_project_dir: str = None
 
@@ -1,8 +1,11 @@
 import asyncio
 import json
 import os
+import re
+import stat
+import sys
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, Callable
 from pathlib import Path
 
@@ -11,15 +14,63 @@ import networkx as nx
 from dbtmon.config import DBTMonConfig
 from dbtmon import __manifest_version__, __version__
 
-COLOR_CONTROL_CHARS = [
-    "\033[0m", # Reset
-    "\033[31m", # Red
-    "\033[32m", # Green
-    "\033[33m", # Yellow
-]
+# Matches ANSI escape sequences such as the color codes dbt wraps its status messages in
+ANSI_RE = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
+
+# Maximum number of bytes to take from stdin at once
+READ_SIZE = 64 * 1024
+
+# Matches the status block at the end of a model status message, e.g. [RUN] or [SUCCESS 1 in 0.5s]
+STATUS_RE = re.compile(r"\[(RUN|SUCCESS|ERROR|SKIP)\b([^\]]*)\]")
+
+# Colored status labels used when displaying threads
+STATUS_DISPLAY = {
+    "RUN": "RUN",
+    "SUCCESS": "\033[32mSUCCESS\033[0m",
+    "ERROR": "\033[31mERROR\033[0m",
+    "SKIP": "\033[33mSKIP\033[0m",
+}
+
+
+def parse_status_line(statement: str) -> tuple[str, int, int, str, str, str] | None:
+    """
+    Splits a dbt model status message into its timestamp, progress, total, text, status and status
+    details, or returns None if the statement is not a model status message. The format is fixed
+    so the fields are sliced out between known delimiters without splitting the whole line:
+
+    12:00:00  1 of 5 START sql view model project.model_name .......... [RUN]
+    12:00:00  1 of 5 OK created sql view model project.model_name ..... [SUCCESS 1 in 0.5s]
+    """
+    status_match = STATUS_RE.search(statement)
+    if status_match is None:
+        return None
+
+    # Lines with a bracketed status but no "N of M" progress are not model status messages
+    status_start = status_match.start()
+    of_index = statement.find(" of ", 9, status_start)
+    if of_index == -1:
+        return None
+    total_end = statement.find(" ", of_index + 4, status_start)
+    if total_end == -1:
+        return None
 
-
-@dataclass
+    try:
+        # int() ignores the padding around the numbers
+        progress = int(statement[9:of_index])
+        total = int(statement[of_index + 4:total_end])
+    except ValueError:
+        return None
+
+    return (
+        statement[:8],
+        progress,
+        total,
+        statement[total_end + 1:status_start].rstrip(),
+        *status_match.groups(),
+    )
+
+
+@dataclass(slots=True)
 class DBTThread:
     timestamp: str
     progress: int
@@ -32,6 +83,8 @@ class DBTThread:
     min_concurrent_threads: int = 999
     max_concurrent_threads: int = 0
     blocking_started_at: float = None
+    # Display prefix, cached while the thread is running since it only changes on completion
+    _stem: str = field(default=None, init=False, repr=False, compare=False)
 
     @property
     def model_name(self) -> str:
@@ -40,18 +93,21 @@ class DBTThread:
         return model_name
 
     @staticmethod
-    def get_timestamp(value: float, format: str = "%H:%M:%S", display_ms: bool = True) -> str:
+    def get_timestamp(value: float, display_ms: bool = True) -> str:
         """Takes a length of time and converts it to a timestamp, optionally with milliseconds"""
-        formatted_time = time.strftime(format, time.gmtime(value))
+        seconds = int(value)
+        formatted_time = f"{seconds // 3600:02}:{seconds // 60 % 60:02}:{seconds % 60:02}"
         if not display_ms:
             return formatted_time
 
         hundredths = int(value % 1 * 100)
         return f"{formatted_time}.{hundredths:02}"
 
-    def get_runtime(self) -> str:
-        """Calculate and format the thread runtime"""
-        elapsed_time = self.runtime or (time.time() - self.started_at)
+    def get_runtime(self, now: float = None) -> str:
+        """Calculate and format the thread runtime, measuring running threads up to now"""
+        if now is None:
+            now = time.time()
+        elapsed_time = self.runtime or (now - self.started_at)
         return self.get_timestamp(elapsed_time)
 
     def get_raw_blocking_time(self) -> float:
@@ -68,30 +124,32 @@ class DBTThread:
 
     def get_status(self) -> str:
         """Get the formatted status of the thread"""
-        match self.status:
-            case "RUN":
-                return "RUN"
-            case "SUCCESS":
-                return "\033[32mSUCCESS\033[0m"
-            case "ERROR":
-                return "\033[31mERROR\033[0m"
-            case "SKIP":
-                return "\033[33mSKIP\033[0m"
-            case _:
-                return "UNKNOWN"
+        return STATUS_DISPLAY.get(self.status, "UNKNOWN")
 
-    def __str__(self) -> str:
-        stem = f"{self.timestamp} {self.progress} of {self.total} {self.message}"
+    def get_stem(self) -> str:
+        """Get the timestamp, progress and message part of the thread's display line"""
+        return f"{self.timestamp} {self.progress} of {self.total} {self.message}"
+
+    def render(self, now: float) -> str:
+        """Format the thread for display, with running threads measured up to now"""
+        if self.status == "RUN":
+            # Running threads are redrawn every refresh but only their elapsed time changes
+            if self._stem is None:
+                self._stem = self.get_stem()
+            return self._stem + f" [ELAPSED: {self.get_runtime(now)}]"
+
+        stem = self.get_stem()
         match self.status:
-            case "RUN":
-                return stem + f" [ELAPSED: {self.get_runtime()}]"
             case "SKIP":
                 return stem + f" [{self.get_status()}]"
             case _:
                 return (
                     stem
-                    + f" [{self.get_status()} {self.exit_code}] in {self.get_runtime()}"
+                    + f" [{self.get_status()} {self.exit_code}] in {self.get_runtime(now)}"
                 )
+
+    def __str__(self) -> str:
+        return self.render(time.time())
             
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -110,124 +168,211 @@ class DBTMonitor:
     def __init__(self, callback: Callable = None, **kwargs):
         self.config = DBTMonConfig(**kwargs)
         self.callback = callback
-        self._threads = {}
+        # Running threads are stored by progress - 1, which is dense from 0 to total - 1
+        self._threads_by_idx: list[DBTThread | None] = []
+        # Indices of the running threads in the order they started
+        self._running_idx: list[int] = []
+        # Completed threads that have not been displayed yet
+        self._completed: list[DBTThread] = []
         self.completed: list[DBTThread] = []
         self.rewind = 0
-
-    @property
-    def threads(self) -> dict[str, DBTThread]:
-        return self._threads
-
-    @property
-    def running_threads(self) -> dict[str, DBTThread]:
-        return {k: v for k, v in self.threads.items() if v.status == "RUN"}
-
-    @property
-    def completed_threads(self) -> dict[str, DBTThread]:
-        return {k: v for k, v in self.threads.items() if v.status != "RUN"}
+        self._buffer: list[str] = []
+        self._refresh_handle: asyncio.TimerHandle = None
+        self._last_refresh = 0.0
+        self._refresh_pending = False
 
     def _print_threads(self):
-        terminal_width = os.get_terminal_size().columns
+        # The whole frame is assembled in one buffer and written at once
+        buffer = self._buffer
+        buffer.clear()
+        # One clock reading is shared by every thread in the frame
+        now = time.time()
         if self.rewind > 0:
-            # This moves the cursor up in the terminal:
-            print(f"\033[{self.rewind}F")
+            # This moves the cursor up in the terminal and erases everything below it, so the
+            # new frame never leaves parts of the previous one behind
+            buffer.append(f"\033[{self.rewind}F\033[0J")
 
         # We want success/error messages to appear at the top and not get overwritten
-        for thread in self.completed_threads.values():
-            formatted_thread = str(thread)
-            print(formatted_thread.ljust(terminal_width))
-
-        # We need the running threads var twice so avoid recalculating it
-        running_threads = self.running_threads.values()
-        thread_count = len(running_threads)
-        for thread in running_threads:
-            formatted_thread = str(thread)
-            print(formatted_thread.ljust(terminal_width))
-
-            # Logging to detect blocking models
-            if thread_count < thread.min_concurrent_threads:
-                # Track when the thread gets to its lowest concurrent thread count
-                thread.blocking_started_at = time.time()
-            thread.min_concurrent_threads = min(thread.min_concurrent_threads, thread_count)
-            thread.max_concurrent_threads = max(thread.max_concurrent_threads, thread_count)
-
-        self.rewind = thread_count + 1
-
-    def process_next_line(self, statement: str):
+        for thread in self._completed:
+            buffer.append(thread.render(now))
+            buffer.append("\n")
+        self._completed.clear()
+
+        threads_by_idx = self._threads_by_idx
+        for index in self._running_idx:
+            buffer.append(threads_by_idx[index].render(now))
+            buffer.append("\n")
+
+        self.rewind = len(self._running_idx)
+        sys.stdout.write("".join(buffer))
+        sys.stdout.flush()
+        self._last_refresh = time.monotonic()
+        self._refresh_pending = False
+
+    def process_next_line(self, statement: str, refresh: bool = True):
+        """
+        Process one line of dbt output. With refresh=False, the display is only marked as needing a
+        refresh for status messages so a batch of lines can be drawn at once.
+        """
         if statement is None:
             return
 
         if not statement.startswith("\033[0m"):
             # This is a continuation of the previous line and never a job status message
+            self._print_pending_threads()
             print(statement)
             return
 
         # Remove color control characters
-        for char in COLOR_CONTROL_CHARS:
-            statement = statement.replace(char, "")
+        statement = ANSI_RE.sub("", statement)
 
-        if all(
-            status not in statement
-            for status in ["[RUN", "[SUCCESS", "[ERROR", "[SKIP"]
-        ):
+        parsed = parse_status_line(statement)
+        if parsed is None:
             # This is not a model status message so we pass it through
+            self._print_pending_threads()
             print(statement)
             return
 
-        timestamp = statement[:8]
-        full_message = statement[9:]
-        message, status = full_message.split("[", maxsplit=1)
-
-        # 1 of 5 START sql view model project.model_name ..........
-        # 1 of 5 OK created sql view model project.model_name .....
-        progress, _, total, *rest = message.split()
-        progress, total = int(progress), int(total)
-        text = " ".join(rest)
-
-        match status.rstrip("]").split():
-            case ["RUN"]:
-                self.threads[progress] = DBTThread(
-                    timestamp=timestamp,
-                    progress=progress,
-                    total=total,
-                    message=text,
-                    status="RUN",
-                    started_at=time.time(),
-                )
-            case ["ERROR", "in", runtime]:
-                if progress not in self.threads:
-                    raise ValueError(f"Thread {progress} not found")
-                self.threads[progress].timestamp = timestamp
-                self.threads[progress].message = text
-                self.threads[progress].status = "ERROR"
-                self.threads[progress].runtime = float(runtime[:-1])
-            case ["SUCCESS", code, "in", runtime]:
-                if progress not in self.threads:
-                    raise ValueError(f"Thread {progress} not found")
-                self.threads[progress].timestamp = timestamp
-                self.threads[progress].message = text
-                self.threads[progress].status = "SUCCESS"
-                self.threads[progress].runtime = float(runtime[:-1])
-                self.threads[progress].exit_code = int(code)
-            case ["SKIP"]:
-                self.threads[progress] = DBTThread(
-                    timestamp=timestamp,
-                    progress=progress,
-                    total=total,
-                    message=text,
-                    status="SKIP",
-                    started_at=None,
-                )
-            case _:
-                print(f"Unknown status: '{status}'")
-
-        self._print_threads()
-        if self.threads[progress].status == "RUN":
+        timestamp, progress, total, text, status, details = parsed
+        handler = self._STATUS_HANDLERS[status]
+        if not handler(self, timestamp, progress, total, text, details):
+            # The status block does not have the expected shape so we pass it through
+            self._print_pending_threads()
+            print(f"Unknown status: '[{status}{details}]'")
+            print(statement)
             return
 
-        # Archive completed threads
-        self.completed.append(self.threads[progress])
-        del self.threads[progress]
+        # Track concurrency on every change of the running threads, whether or not it is drawn
+        self._update_concurrency()
+        if refresh:
+            self._print_threads()
+        else:
+            self._refresh_pending = True
+
+    def _update_concurrency(self):
+        """Record the current number of running threads on each running thread"""
+        now = time.time()
+        threads_by_idx = self._threads_by_idx
+        thread_count = len(self._running_idx)
+        for index in self._running_idx:
+            thread = threads_by_idx[index]
+
+            # Logging to detect blocking models
+            if thread_count < thread.min_concurrent_threads:
+                # Track when the thread gets to its lowest concurrent thread count
+                thread.blocking_started_at = now
+            thread.min_concurrent_threads = min(thread.min_concurrent_threads, thread_count)
+            thread.max_concurrent_threads = max(thread.max_concurrent_threads, thread_count)
+
+    def _print_pending_threads(self):
+        """Draw status updates held back by process_next_line before anything else is printed"""
+        if self._refresh_pending:
+            self._print_threads()
+
+    # Each status handler returns False without changing any state if the status details do not
+    # have the expected shape
+
+    def _on_run(self, timestamp: str, progress: int, total: int, text: str, details: str) -> bool:
+        # [RUN]
+        if details.strip():
+            return False
+
+        index = progress - 1
+        missing = max(total, progress) - len(self._threads_by_idx)
+        if missing > 0:
+            self._threads_by_idx.extend([None] * missing)
+
+        if self._threads_by_idx[index] is None:
+            self._running_idx.append(index)
+        self._threads_by_idx[index] = DBTThread(
+            timestamp=timestamp,
+            progress=progress,
+            total=total,
+            message=text,
+            status="RUN",
+            started_at=time.time(),
+        )
+        return True
+
+    def _pop_running(self, progress: int) -> DBTThread:
+        """Remove a running thread by its progress number and return it"""
+        index = progress - 1
+        if index >= len(self._threads_by_idx) or self._threads_by_idx[index] is None:
+            raise ValueError(f"Thread {progress} not found")
+        self._running_idx.remove(index)
+        thread = self._threads_by_idx[index]
+        self._threads_by_idx[index] = None
+        return thread
+
+    def _on_error(self, timestamp: str, progress: int, total: int, text: str, details: str) -> bool:
+        # [ERROR in 0.5s]
+        tokens = details.split()
+        if len(tokens) != 2 or tokens[0] != "in":
+            return False
+        try:
+            runtime = float(tokens[1][:-1])
+        except ValueError:
+            return False
+
+        thread = self._pop_running(progress)
+        thread.timestamp = timestamp
+        thread.message = text
+        thread.status = "ERROR"
+        thread.runtime = runtime
+        self._complete_thread(thread)
+        return True
+
+    def _on_success(
+        self, timestamp: str, progress: int, total: int, text: str, details: str
+    ) -> bool:
+        # [SUCCESS 1 in 0.5s]
+        tokens = details.split()
+        if len(tokens) != 3 or tokens[1] != "in":
+            return False
+        try:
+            exit_code = int(tokens[0])
+            runtime = float(tokens[2][:-1])
+        except ValueError:
+            return False
+
+        thread = self._pop_running(progress)
+        thread.timestamp = timestamp
+        thread.message = text
+        thread.status = "SUCCESS"
+        thread.runtime = runtime
+        thread.exit_code = exit_code
+        self._complete_thread(thread)
+        return True
+
+    def _on_skip(self, timestamp: str, progress: int, total: int, text: str, details: str) -> bool:
+        # [SKIP]
+        if details.strip():
+            return False
+
+        self._complete_thread(
+            DBTThread(
+                timestamp=timestamp,
+                progress=progress,
+                total=total,
+                message=text,
+                status="SKIP",
+                started_at=None,
+            )
+        )
+        return True
+
+    # Status handlers keyed by the first token of the status block
+    _STATUS_HANDLERS = {
+        "RUN": _on_run,
+        "ERROR": _on_error,
+        "SUCCESS": _on_success,
+        "SKIP": _on_skip,
+    }
+
+    def _complete_thread(self, thread: DBTThread):
+        """Queue a finished thread for display and archive it"""
+        self._completed.append(thread)
+        self.completed.append(thread)
 
     def get_project_dir(self) -> Path:
         # Check command line args first
@@ -354,22 +499,69 @@ class DBTMonitor:
 
         return dag
 
+    def _tick(self):
+        """Refresh the running threads display until no threads are left running"""
+        if not self._running_idx:
+            self._refresh_handle = None
+            return
+
+        # Lines from dbt also redraw the display, so only redraw once the display has gone a full
+        # polling interval without an update. Otherwise sleep until that deadline.
+        delay = self._last_refresh + self.config.polling_rate - time.monotonic()
+        if delay <= 0:
+            self._print_threads()
+            delay = self.config.polling_rate
+
+        loop = asyncio.get_running_loop()
+        self._refresh_handle = loop.call_later(delay, self._tick)
+
     async def run(self):
-        while True:
-            input_task = asyncio.create_task(asyncio.to_thread(input))
-            await asyncio.sleep(self.config.minimum_wait)
-            while not input_task.done():
-                await asyncio.sleep(self.config.polling_rate)
-                if not self.threads:
-                    continue
-                self._print_threads()
+        # Read stdin through the event loop instead of a thread per line so that each line is
+        # processed as soon as it arrives. The display refresh is driven by its own timer, so the
+        # event loop's selector sleeps until either stdin is readable or the next refresh is due.
+        loop = asyncio.get_running_loop()
+        stdin_fd = sys.stdin.fileno()
+        transport = None
+        if sys.platform != "win32" and stat.S_ISFIFO(os.fstat(stdin_fd).st_mode):
+            # The pipe transport switches stdin to non-blocking mode, restored when done
+            stdin_blocking = os.get_blocking(stdin_fd)
+            reader = asyncio.StreamReader()
+            transport, _ = await loop.connect_read_pipe(
+                lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+            )
 
-            try:
-                statement = await input_task
-            except EOFError:
-                break
+            async def read_chunk() -> bytes:
+                return await reader.read(READ_SIZE)
+        else:
+            # Files, terminals and Windows pipes cannot be attached to the event loop, so fall
+            # back to blocking reads in the default executor
+            async def read_chunk() -> bytes:
+                return await loop.run_in_executor(None, sys.stdin.buffer.read1, READ_SIZE)
 
-            self.process_next_line(statement)
+        try:
+            # Each read returns everything dbt has written so far, so a burst of lines is processed
+            # in one pass and the display is redrawn once for the whole batch
+            partial_line = b""
+            while chunk := await read_chunk():
+                *lines, partial_line = (partial_line + chunk).split(b"\n")
+                for line in lines:
+                    statement = line.decode(errors="replace").rstrip("\r")
+                    self.process_next_line(statement, refresh=False)
+                self._print_pending_threads()
+
+                if self._refresh_handle is None and self._running_idx:
+                    self._refresh_handle = loop.call_later(self.config.polling_rate, self._tick)
+
+            if partial_line:
+                # Output did not end with a newline
+                self.process_next_line(partial_line.decode(errors="replace").rstrip("\r"))
+        finally:
+            if self._refresh_handle is not None:
+                self._refresh_handle.cancel()
+                self._refresh_handle = None
+            if transport is not None:
+                os.set_blocking(stdin_fd, stdin_blocking)
+                transport.close()
 
         # Post-dbt work
         # Identify blocking models
@@ -402,7 +594,7 @@ class DBTMonitor:
             for line in file:
                 self.process_next_line(line.strip())
 
-                if not self.threads:
+                if not self._running_idx:
                     continue
                 for _ in range(5):
                     time.sleep(self.config.polling_rate)
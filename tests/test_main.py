@@ -0,0 +1,21 @@
+import json
+
+from dbtmon import __main__
+from dbtmon.__main__ import read_config
+
+
+def test_read_config_ignores_cache_for_different_options(tmp_path, monkeypatch):
+    config = tmp_path / "dbtmon.yml"
+    config.write_text("polling-rate: 0.5\nnew-option: 1\n")
+    assert read_config(config) == (["--polling-rate", "0.5"], ["new-option"])
+
+    monkeypatch.setattr(__main__, "OPTIONS", __main__.OPTIONS | {"new-option"})
+    assert read_config(config) == (["--polling-rate", "0.5", "--new-option", "1"], [])
+
+
+def test_read_config_ignores_non_object_cache(tmp_path):
+    config = tmp_path / "dbtmon.yml"
+    config.write_text("polling-rate: 0.5\n")
+    (tmp_path / ".dbtmon.yml.cache").write_text(json.dumps(["--polling-rate", "0.1"]))
+
+    assert read_config(config) == (["--polling-rate", "0.5"], [])
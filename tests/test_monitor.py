@@ -0,0 +1,95 @@
+import asyncio
+import sys
+
+from dbtmon.monitor import DBTMonitor
+
+
+def status_line(progress: int, total: int, text: str, status: str) -> str:
+    return f"\033[0m12:00:00  {progress} of {total} {text} .......... [{status}]"
+
+
+def test_unexpected_success_details_are_passed_through(capsys):
+    monitor = DBTMonitor()
+    monitor.process_next_line(status_line(1, 2, "START sql view model proj.a", "RUN"))
+    line = status_line(1, 2, "OK created sql view model proj.a", "SUCCESS in 0.50s")
+    monitor.process_next_line(line)
+
+    output = capsys.readouterr().out
+    assert "Unknown status: '[SUCCESS in 0.50s]'" in output
+    assert "OK created sql view model proj.a" in output
+    assert monitor._running_idx == [0]
+    assert monitor.completed == []
+
+
+def test_unexpected_error_details_are_passed_through(capsys):
+    monitor = DBTMonitor()
+    monitor.process_next_line(status_line(1, 2, "START sql view model proj.a", "RUN"))
+    line = status_line(1, 2, "ERROR creating sql view model proj.a", "ERROR")
+    monitor.process_next_line(line)
+
+    output = capsys.readouterr().out
+    assert "Unknown status: '[ERROR]'" in output
+    assert "ERROR creating sql view model proj.a" in output
+    assert monitor._running_idx == [0]
+    assert monitor.completed == []
+
+
+def test_unparseable_success_details_keep_the_thread_running(capsys):
+    monitor = DBTMonitor()
+    monitor.process_next_line(status_line(1, 2, "START sql view model proj.a", "RUN"))
+    line = status_line(1, 2, "OK created sql view model proj.a", "SUCCESS CREATE in 0.5s")
+    monitor.process_next_line(line)
+
+    assert "Unknown status: '[SUCCESS CREATE in 0.5s]'" in capsys.readouterr().out
+    assert monitor._running_idx == [0]
+    assert monitor.completed == []
+
+
+def test_concurrency_is_tracked_without_redraws():
+    monitor = DBTMonitor()
+    lines = [
+        status_line(1, 3, "START sql view model proj.a", "RUN"),
+        status_line(2, 3, "START sql view model proj.b", "RUN"),
+        status_line(1, 3, "OK created sql view model proj.a", "SUCCESS 1 in 0.52s"),
+        status_line(2, 3, "OK created sql view model proj.b", "SUCCESS 1 in 0.61s"),
+        status_line(3, 3, "START sql view model proj.c", "RUN"),
+        status_line(3, 3, "OK created sql view model proj.c", "SUCCESS 1 in 0.10s"),
+    ]
+    for line in lines:
+        monitor.process_next_line(line, refresh=False)
+
+    concurrency = {
+        thread.model_name: (thread.min_concurrent_threads, thread.max_concurrent_threads)
+        for thread in monitor.completed
+    }
+    assert concurrency == {"a": (1, 2), "b": (1, 2), "c": (1, 1)}
+
+
+def test_run_reads_stdin_from_a_file(tmp_path, monkeypatch):
+    log = tmp_path / "dbt.log"
+    log.write_text(
+        "Running with dbt\n"
+        + status_line(1, 2, "START sql view model proj.a", "RUN") + "\n"
+        + status_line(1, 2, "OK created sql view model proj.a", "SUCCESS 1 in 0.52s") + "\n"
+        + status_line(2, 2, "SKIP relation proj.b", "SKIP")
+    )
+    monitor = DBTMonitor(disable_blocking_thread_detection=True, disable_dbtmon_manifest=True)
+    with open(log, "r") as stdin:
+        monkeypatch.setattr(sys, "stdin", stdin)
+        asyncio.run(monitor.run())
+
+    assert [(thread.model_name, thread.status) for thread in monitor.completed] == [
+        ("a", "SUCCESS"),
+        ("b", "SKIP"),
+    ]
+
+
+def test_bracketed_line_without_progress_is_passed_through(capsys):
+    monitor = DBTMonitor()
+    monitor.process_next_line("\033[0m12:00:00  Finished running [RUN] stuff")
+    monitor.process_next_line("\033[0m12:00:00  Run one of the models [RUN]")
+
+    output = capsys.readouterr().out
+    assert "12:00:00  Finished running [RUN] stuff" in output
+    assert "12:00:00  Run one of the models [RUN]" in output
+    assert monitor._running_idx == []
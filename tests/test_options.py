@@ -0,0 +1,7 @@
+from dbtmon.__main__ import OPTIONS, parser
+
+
+def test_options_match_parser():
+    assert OPTIONS == {
+        option.lstrip("-") for action in parser._actions for option in action.option_strings
+    }